@@ -6,10 +6,19 @@ import json
 import os
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
+try:
+    import fitz  # type: ignore
+except ImportError:
+    sys.stderr.write(
+        "PyMuPDF not installed. Install with: python -m pip install -r packages/cli/scripts/requirements-pdf.txt\n"
+    )
+    sys.exit(2)
+
 
 def _run_pdftotext(pdf_path: Path) -> str:
     try:
@@ -25,6 +34,17 @@ def _run_pdftotext(pdf_path: Path) -> str:
         raise RuntimeError("pdftotext not found. Install with: brew install poppler")
 
 
+def _extract_text_pymupdf(pdf_path: Path) -> str:
+    with fitz.open(str(pdf_path)) as doc:
+        return "\n".join(page.get_text() for page in doc)
+
+
+VERIFY_BACKENDS = {
+    "pymupdf": _extract_text_pymupdf,
+    "pdftotext": _run_pdftotext,
+}
+
+
 def _require(cond: bool, msg: str) -> None:
     if not cond:
         raise RuntimeError(msg)
@@ -44,24 +64,32 @@ class SceneSpec:
     out_name: str
 
 
-def _find_marker_rect(page, marker_text: str):
-    rects = page.search_for(marker_text)
-    if not rects:
-        return None
-    # pick the earliest on the page (top-most, then left-most)
-    rects = sorted(rects, key=lambda r: (r.y0, r.x0))
-    return rects[0]
+def _find_marker_rect(doc, page_index0: int, marker_text: str, cache: Optional[dict] = None):
+    # Adjacent scenes share a boundary page (scene N's end marker is scene N+1's start
+    # marker), so memoize lookups to avoid re-extracting that page's text layout.
+    # A cache belongs to a single source document.
+    key = (page_index0, marker_text)
+    if cache is not None and key in cache:
+        return cache[key]
 
+    rects = doc[page_index0].search_for(marker_text)
+    rect = None
+    if rects:
+        # pick the earliest on the page (top-most, then left-most)
+        rect = sorted(rects, key=lambda r: (r.y0, r.x0))[0]
 
-def _copy_clipped_page(out_doc, src_doc, page_index0: int, clip):
+    if cache is not None:
+        cache[key] = rect
+    return rect
+
+
+def _copy_clipped_page(out_doc, src_doc, page_index0: int, clip, pno: int = -1):
     src_page = src_doc[page_index0]
     width = clip.x1 - clip.x0
     height = clip.y1 - clip.y0
     _require(width > 1 and height > 1, f"Invalid clip rect for page {page_index0+1}: {clip}")
-    new_page = out_doc.new_page(width=width, height=height)
+    new_page = out_doc.new_page(pno=pno, width=width, height=height)
     # Place clipped region into new page coordinates
-    import fitz  # type: ignore
-
     new_page.show_pdf_page(
         fitz.Rect(0, 0, width, height),
         src_doc,
@@ -70,19 +98,26 @@ def _copy_clipped_page(out_doc, src_doc, page_index0: int, clip):
     )
 
 
-def extract_scene_pdf(
-    src_pdf: Path,
+def _crop_page(out_doc, pno: int, clip) -> None:
+    page = out_doc[pno]
+    page.set_cropbox(clip)
+    # pdftotext (used at import time) reads the MediaBox by default and keeps any glyph inside it,
+    # so shrink the MediaBox to the same box or the cropped-away markers would still be extracted.
+    out_doc.xref_set_key(page.xref, "MediaBox", out_doc.xref_get_key(page.xref, "CropBox")[1])
+
+
+def extract_scene_pdf_from_doc(
+    doc,
     out_pdf: Path,
     start: Marker,
     end: Marker,
     start_pad_pt: float,
     end_pad_pt: float,
+    marker_cache: Optional[dict] = None,
 ) -> dict:
-    import fitz  # type: ignore
+    if marker_cache is None:
+        marker_cache = {}
 
-    _require(src_pdf.exists(), f"Input PDF not found: {src_pdf}")
-
-    doc = fitz.open(str(src_pdf))
     _require(doc.page_count >= max(start.page_1based, end.page_1based), "PDF has fewer pages than expected")
 
     start_idx0 = start.page_1based - 1
@@ -92,8 +127,8 @@ def extract_scene_pdf(
     start_page = doc[start_idx0]
     end_page = doc[end_idx0]
 
-    start_rect = _find_marker_rect(start_page, start.text)
-    end_rect = _find_marker_rect(end_page, end.text)
+    start_rect = _find_marker_rect(doc, start_idx0, start.text, marker_cache)
+    end_rect = _find_marker_rect(doc, end_idx0, end.text, marker_cache)
     _require(start_rect is not None, f'Marker "{start.text}" not found on page {start.page_1based}')
     _require(end_rect is not None, f'Marker "{end.text}" not found on page {end.page_1based}')
 
@@ -107,11 +142,12 @@ def extract_scene_pdf(
 
     _require(end_idx0 > start_idx0 or end_y > start_y, "End marker must be below start marker (or on later page)")
 
+    # Copy the page range as-is (no re-wrapping of content streams), then crop the boundary pages.
     out_doc = fitz.open()
+    out_doc.insert_pdf(doc, from_page=start_idx0, to_page=end_idx0)
 
-    for page0 in range(start_idx0, end_idx0 + 1):
-        page = doc[page0]
-        page_rect = page.rect
+    for page0 in sorted({start_idx0, end_idx0}):
+        page_rect = doc[page0].rect
         clip = page_rect
 
         if page0 == start_idx0:
@@ -123,12 +159,17 @@ def extract_scene_pdf(
         if page0 == start_idx0 and page0 == end_idx0:
             clip = fitz.Rect(page_rect.x0, start_y, page_rect.x1, end_y)
 
-        _copy_clipped_page(out_doc, doc, page0, clip)
+        pno = page0 - start_idx0
+        try:
+            _crop_page(out_doc, pno, clip)
+        except ValueError:
+            # CropBox rejected (e.g. not inside the MediaBox): embed the clipped region on a fresh page instead.
+            out_doc.delete_page(pno)
+            _copy_clipped_page(out_doc, doc, page0, clip, pno=pno)
 
     out_pdf.parent.mkdir(parents=True, exist_ok=True)
     out_doc.save(str(out_pdf), deflate=True)
     out_doc.close()
-    doc.close()
 
     return {
         "output": str(out_pdf),
@@ -138,8 +179,48 @@ def extract_scene_pdf(
     }
 
 
-def verify_scene_pdf(out_pdf: Path, forbidden_markers: list[str]) -> dict:
-    text = _run_pdftotext(out_pdf)
+def extract_scene_pdf(
+    src_pdf: Path,
+    out_pdf: Path,
+    start: Marker,
+    end: Marker,
+    start_pad_pt: float,
+    end_pad_pt: float,
+) -> dict:
+    _require(src_pdf.exists(), f"Input PDF not found: {src_pdf}")
+
+    with fitz.open(str(src_pdf)) as doc:
+        return extract_scene_pdf_from_doc(
+            doc,
+            out_pdf=out_pdf,
+            start=start,
+            end=end,
+            start_pad_pt=start_pad_pt,
+            end_pad_pt=end_pad_pt,
+        )
+
+
+# Per-process cache of opened source PDFs (keyed by resolved path), so each pool worker
+# parses the input once no matter how many scenes it handles.
+_OPEN_DOCS: dict[str, object] = {}
+
+
+def _shared_doc(src_pdf: Path):
+    key = str(src_pdf)
+    doc = _OPEN_DOCS.get(key)
+    if doc is None:
+        _require(src_pdf.exists(), f"Input PDF not found: {src_pdf}")
+        doc = fitz.open(key)
+        _OPEN_DOCS[key] = doc
+    return doc
+
+
+def _init_worker(src_pdf: Path) -> None:
+    _shared_doc(src_pdf)
+
+
+def verify_scene_pdf(out_pdf: Path, forbidden_markers: list[str], backend: str = "pymupdf") -> dict:
+    text = VERIFY_BACKENDS[backend](out_pdf)
     violations = []
     warnings = []
     for m in forbidden_markers:
@@ -152,11 +233,48 @@ def verify_scene_pdf(out_pdf: Path, forbidden_markers: list[str]) -> dict:
     return {"ok": len(violations) == 0, "violations": violations, "warnings": warnings}
 
 
+def process_spec(
+    src_pdf: Path,
+    out_dir: Path,
+    spec: SceneSpec,
+    start_pad_pt: float,
+    end_pad_pt: float,
+    verify: bool,
+    verify_backend: str = "pymupdf",
+    marker_rects: Optional[dict] = None,
+) -> dict:
+    # Worker entrypoint: extract + (optionally) verify one scene in a single process.
+    # marker_rects is the parent's pre-resolved marker cache, so workers don't search for markers again.
+    out_pdf = out_dir / spec.out_name
+    res = extract_scene_pdf_from_doc(
+        _shared_doc(src_pdf),
+        out_pdf=out_pdf,
+        start=spec.start,
+        end=spec.end,
+        start_pad_pt=start_pad_pt,
+        end_pad_pt=end_pad_pt,
+        marker_cache=dict(marker_rects or {}),
+    )
+    if verify:
+        res["verify"] = verify_scene_pdf(
+            out_pdf,
+            forbidden_markers=[spec.start.text, spec.end.text],
+            backend=verify_backend,
+        )
+    return res
+
+
 def main(argv: list[str]) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="inp", required=True, help="Input PDF path")
     ap.add_argument("--out-dir", required=True, help="Output directory")
-    ap.add_argument("--verify", action="store_true", help="Run pdftotext checks on outputs")
+    ap.add_argument("--verify", action="store_true", help="Run text checks on outputs")
+    ap.add_argument(
+        "--verify-backend",
+        choices=sorted(VERIFY_BACKENDS),
+        default="pymupdf",
+        help="Text extractor used by --verify (pymupdf runs in-process; pdftotext shells out to poppler)",
+    )
     ap.add_argument("--scene4-start-pad-pt", type=float, default=2.0)
     ap.add_argument("--scene4-end-pad-pt", type=float, default=2.0)
     ap.add_argument("--scene5-start-pad-pt", type=float, default=2.0)
@@ -165,6 +283,7 @@ def main(argv: list[str]) -> int:
 
     inp = Path(args.inp).expanduser().resolve()
     out_dir = Path(args.out_dir).expanduser().resolve()
+    _require(inp.exists(), f"Input PDF not found: {inp}")
 
     # Fixed known markers for the canonical Spring Awakening PDF in this repo.
     scenes = [
@@ -182,31 +301,40 @@ def main(argv: list[str]) -> int:
         ),
     ]
 
-    results = []
-    ok = True
+    jobs = []
     for spec in scenes:
-        out_pdf = out_dir / spec.out_name
         if spec.scene == 4:
             start_pad = args.scene4_start_pad_pt
             end_pad = args.scene4_end_pad_pt
         else:
             start_pad = args.scene5_start_pad_pt
             end_pad = args.scene5_end_pad_pt
-
-        res = extract_scene_pdf(
-            src_pdf=inp,
-            out_pdf=out_pdf,
-            start=spec.start,
-            end=spec.end,
-            start_pad_pt=start_pad,
-            end_pad_pt=end_pad,
-        )
-        if args.verify:
-            ver = verify_scene_pdf(out_pdf, forbidden_markers=[spec.start.text, spec.end.text])
-            res["verify"] = ver
-            if not ver["ok"]:
-                ok = False
-        results.append(res)
+        jobs.append((spec, start_pad, end_pad))
+
+    # Resolve every marker once up front: the shared boundary page is searched a single time
+    # here, whereas scenes handled by different workers would each search it again.
+    marker_rects: dict = {}
+    with fitz.open(str(inp)) as doc:
+        for spec in scenes:
+            for marker in (spec.start, spec.end):
+                if 1 <= marker.page_1based <= doc.page_count:
+                    _find_marker_rect(doc, marker.page_1based - 1, marker.text, marker_rects)
+
+    by_scene: dict[int, dict] = {}
+    max_workers = max(1, min(len(jobs), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(inp,)) as executor:
+        futures = {
+            executor.submit(
+                process_spec, inp, out_dir, spec, start_pad, end_pad, args.verify, args.verify_backend, marker_rects
+            ): spec.scene
+            for spec, start_pad, end_pad in jobs
+        }
+        for fut in as_completed(futures):
+            by_scene[futures[fut]] = fut.result()
+
+    # Preserve the canonical scene order in the output regardless of completion order.
+    results = [by_scene[spec.scene] for spec in scenes]
+    ok = all(res.get("verify", {}).get("ok", True) for res in results)
 
     payload = {"ok": ok, "input": str(inp), "outputs": results}
     sys.stdout.write(json.dumps(payload) + "\n")
@@ -56,27 +56,12 @@ def read_wav_mono_16k(path: str) -> np.ndarray:
     return audio_f32
 
 
-def ctc_collapse(ids, blank_id: int):
-    collapsed = []
-    prev = None
-    for idx in ids:
-        if idx == prev:
-            continue
-        prev = idx
-        if idx == blank_id:
-            continue
-        collapsed.append(idx)
-    return collapsed
-
-
 def load_vocab(model_id: str) -> dict[int, str]:
     vocab_path = hf_hub_download(repo_id=model_id, filename="vocab.json")
     with open(vocab_path, "r", encoding="utf-8") as f:
         token_to_id = json.load(f)
-    id_to_token: dict[int, str] = {}
-    for token, idx in token_to_id.items():
-        id_to_token[int(idx)] = token
-    return id_to_token
+    # Coerce ids once and intern tokens so every response reuses the same string objects.
+    return {int(idx): sys.intern(token) for token, idx in token_to_id.items()}
 
 
 def main() -> None:
@@ -126,11 +111,15 @@ def main() -> None:
     if logits.device.type != "mps":
         fail(f"Inference did not run on MPS (got {logits.device}).", 2)
 
-    pred_ids = torch.argmax(logits, dim=-1)[0].to("cpu").tolist()
+    # CTC collapse on-device (first frame of each run, minus blanks) so only the collapsed ids are copied back.
+    pred_ids = torch.argmax(logits, dim=-1)[0]
     blank_id = int(getattr(model.config, "pad_token_id", 0))
-    collapsed = ctc_collapse(pred_ids, blank_id)
+    keep = torch.ones_like(pred_ids, dtype=torch.bool)
+    keep[1:] = pred_ids[1:] != pred_ids[:-1]
+    keep &= pred_ids != blank_id
+    collapsed = pred_ids[keep].cpu().numpy()
 
-    tokens = [id_to_token.get(int(idx)) for idx in collapsed]
+    tokens = [id_to_token.get(idx) for idx in collapsed.tolist()]
     special = {"<pad>", "<s>", "</s>", "<unk>"}
 
     phones = []
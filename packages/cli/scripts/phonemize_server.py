@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 import argparse
-import io
+import asyncio
+import hashlib
 import json
+import math
 import os
+import queue
+import struct
 import sys
 import time
 import threading
-import wave
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import warnings
+from collections import OrderedDict
 
 
 def fail(message: str, code: int = 2) -> None:
@@ -28,55 +32,98 @@ try:
     import torch
     from huggingface_hub import hf_hub_download
     from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForCTC
+
+    import orjson
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.requests import Request
+    from starlette.responses import Response
+    from starlette.routing import Route
 except Exception as exc:
-    fail(f"Missing Python dependency: {exc}. Install: pip3 install torch transformers numpy", 2)
+    fail(
+        f"Missing Python dependency: {exc}. Install: pip3 install torch transformers numpy starlette uvicorn orjson",
+        2,
+    )
 
 
 DEFAULT_MODEL = "facebook/wav2vec2-xlsr-53-espeak-cv-ft"
 
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
 
-def ctc_collapse(ids, blank_id: int):
-    collapsed = []
-    prev = None
-    for idx in ids:
-        if idx == prev:
-            continue
-        prev = idx
-        if idx == blank_id:
-            continue
-        collapsed.append(idx)
-    return collapsed
+# read_wav_mono_16k_from_bytes only reads through its int16 view of the (immutable) request body.
+warnings.filterwarnings("ignore", message="The given buffer is not writable", category=UserWarning)
 
 
 def load_vocab(model_id: str) -> dict[int, str]:
     vocab_path = hf_hub_download(repo_id=model_id, filename="vocab.json")
     with open(vocab_path, "r", encoding="utf-8") as f:
         token_to_id = json.load(f)
-    id_to_token: dict[int, str] = {}
-    for token, idx in token_to_id.items():
-        id_to_token[int(idx)] = token
-    return id_to_token
-
-
-def read_wav_mono_16k_from_bytes(raw: bytes) -> np.ndarray:
-    try:
-        with wave.open(io.BytesIO(raw), "rb") as wf:
-            channels = wf.getnchannels()
-            sample_rate = wf.getframerate()
-            sample_width = wf.getsampwidth()
-            frames = wf.getnframes()
-            if channels != 1:
-                raise ValueError(f"WAV must be mono (1 channel), got {channels}")
-            if sample_rate != 16000:
-                raise ValueError(f"WAV must be 16kHz, got {sample_rate}Hz")
-            if sample_width != 2:
-                raise ValueError(f"WAV must be 16-bit PCM, got sample width {sample_width}")
-            pcm = wf.readframes(frames)
-    except wave.Error as exc:
-        raise ValueError(f"Failed to decode WAV: {exc}")
-
-    audio_i16 = np.frombuffer(pcm, dtype=np.int16)
-    return audio_i16.astype(np.float32) / 32768.0
+    # Coerce ids once and intern tokens so every response reuses the same string objects.
+    return {int(idx): sys.intern(token) for token, idx in token_to_id.items()}
+
+
+def parse_wav_header(raw: bytes) -> tuple[int, int, int, int, int]:
+    """Return (channels, sample_rate, sample_width, data_offset, data_len) for a RIFF/WAVE PCM blob."""
+    if len(raw) < 12 or raw[0:4] != b"RIFF" or raw[8:12] != b"WAVE":
+        raise ValueError("Failed to decode WAV: file does not start with RIFF id")
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(raw):
+        chunk_id = raw[pos : pos + 4]
+        chunk_size = struct.unpack_from("<I", raw, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + 16 > len(raw):
+                raise ValueError("Failed to decode WAV: truncated fmt chunk")
+            audio_format, channels, sample_rate, _byte_rate, _block_align, bits = struct.unpack_from("<HHIIHH", raw, body)
+            if audio_format not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE):
+                raise ValueError(f"Failed to decode WAV: unknown format: {audio_format}")
+            fmt = (channels, sample_rate, (bits + 7) // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("Failed to decode WAV: data chunk before fmt chunk")
+            # Streaming writers may leave the size as a placeholder; clamp to what we actually have.
+            data_len = min(chunk_size, len(raw) - body)
+            return fmt[0], fmt[1], fmt[2], body, data_len
+        pos = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("Failed to decode WAV: missing fmt or data chunk")
+
+
+def wav_duration_seconds(raw: bytes) -> float:
+    channels, sample_rate, sample_width, _data_offset, data_len = parse_wav_header(raw)
+    frame_bytes = max(1, channels * sample_width)
+    return (data_len // frame_bytes) / float(max(1, sample_rate))
+
+
+def read_wav_mono_16k_from_bytes(raw: bytes) -> torch.Tensor:
+    channels, sample_rate, sample_width, data_offset, data_len = parse_wav_header(raw)
+    if channels != 1:
+        raise ValueError(f"WAV must be mono (1 channel), got {channels}")
+    if sample_rate != 16000:
+        raise ValueError(f"WAV must be 16kHz, got {sample_rate}Hz")
+    if sample_width != 2:
+        raise ValueError(f"WAV must be 16-bit PCM, got sample width {sample_width}")
+
+    count = data_len // 2
+    if count == 0:
+        return torch.zeros(0, dtype=torch.float32)
+    # int16 view over the request body (no copy), then a single float32 allocation scaled in place.
+    audio_i16 = torch.frombuffer(raw, dtype=torch.int16, count=count, offset=data_offset)
+    return audio_i16.to(torch.float32).mul_(1.0 / 32768.0)
+
+
+def _parity_probe_audio() -> torch.Tensor:
+    # Deterministic 1s speech-band signal: a 120 Hz -> 3.5 kHz chirp under a 4 Hz syllable-rate
+    # envelope, plus seeded noise, so the model emits non-blank frames to compare across dtypes.
+    t = torch.arange(16000, dtype=torch.float64) / 16000.0
+    chirp = torch.sin(2 * math.pi * (120.0 * t + 0.5 * (3500.0 - 120.0) * t * t))
+    envelope = 0.5 * (1.0 - torch.cos(2 * math.pi * 4.0 * t))
+    noise = torch.randn(16000, generator=torch.Generator().manual_seed(0), dtype=torch.float64)
+    return (0.5 * envelope * chirp + 0.05 * noise).to(torch.float32)
 
 
 class Runtime:
@@ -84,10 +131,16 @@ class Runtime:
         self,
         model_id: str,
         max_payload_bytes: int,
+        max_audio_seconds: float,
         max_inflight: int,
         max_queue: int,
         queue_wait_seconds: float,
         forced_align_enabled: bool,
+        dtype: str = "fp16",
+        batch_size: int = 8,
+        batch_timeout_ms: float = 10.0,
+        result_cache_size: int = 256,
+        compile_model: bool = False,
     ):
         if not torch.backends.mps.is_built():
             fail("PyTorch is not built with MPS support.", 2)
@@ -96,189 +149,415 @@ class Runtime:
 
         self.model_id = model_id
         self.max_payload_bytes = max_payload_bytes
+        self.max_audio_seconds = max_audio_seconds
         self.max_inflight = max_inflight
         self.max_queue = max_queue
         self.queue_wait_seconds = queue_wait_seconds
         self.forced_align_enabled = forced_align_enabled
+        self.dtype_name = dtype
+        self.dtype = torch.float16 if dtype == "fp16" else torch.float32
+        self.batch_size = batch_size
+        self.batch_timeout_ms = batch_timeout_ms
+        self.result_cache_size = result_cache_size
 
         self.device = torch.device("mps")
 
         t0 = time.time()
-        self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_id)
+        feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_id)
+        self.do_normalize = bool(feature_extractor.do_normalize)
+        self.return_attention_mask = bool(feature_extractor.return_attention_mask)
+        self.padding_value = float(feature_extractor.padding_value)
+        # Standard wav2vec2 preprocessing is just per-utterance normalization + padding, done inline
+        # below; only keep the extractor around for configs that do something else.
+        standard = feature_extractor.feature_size == 1 and feature_extractor.sampling_rate == 16000
+        self.feature_extractor = None if standard else feature_extractor
         self.model = Wav2Vec2ForCTC.from_pretrained(model_id).to(self.device)
         self.model.eval()
         self.id_to_token = load_vocab(model_id)
+        self.blank_id = int(getattr(self.model.config, "pad_token_id", 0))
+        # Receptive field of the conv feature encoder (400 samples / 25ms for standard wav2vec2):
+        # anything shorter cannot produce a single frame.
+        min_samples, hop = 1, 1
+        for kernel, stride in zip(self.model.config.conv_kernel, self.model.config.conv_stride):
+            min_samples += (kernel - 1) * hop
+            hop *= stride
+        self.min_audio_seconds = min_samples / 16000.0
         self.load_ms = (time.time() - t0) * 1000.0
+        self._tool_info = {
+            "name": "wav2vec2",
+            "model": model_id,
+            "device": "mps",
+            "torch": torch.__version__,
+            "transformers": __import__("transformers").__version__,
+        }
 
         self.special_tokens = {"<pad>", "<s>", "</s>", "<unk>", "|"}
+        vocab_size = max(max(self.id_to_token) + 1, int(self.model.config.vocab_size))
+        self.id_to_token_arr = np.array([self.id_to_token.get(i, "") for i in range(vocab_size)], dtype=object)
+        # keep_mask[i] is True iff id i decodes to a real phone (non-empty, not a special/word-boundary token).
+        self.keep_mask = np.array([bool(tok) and tok not in self.special_tokens for tok in self.id_to_token_arr], dtype=bool)
 
-        self._cv = threading.Condition()
+        self._slots = asyncio.Semaphore(max_inflight)
         self._active = 0
         self._queued = 0
 
+        # LRU of phones keyed by a BLAKE2b digest of the raw WAV bytes.
+        self._result_cache: OrderedDict[bytes, list[str]] = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        t1 = time.time()
+        # The feature extractor stays FP32 (NumPy on CPU); only weights and inputs are cast.
+        self._forward_model = self.model
+        self.compiled = False
+        # FP16 drift check: decode a real-signal probe in FP32 first, then again after the cast.
+        # (Silence normalizes to all zeros and decodes to nothing in either precision.)
+        probe = _parity_probe_audio() if self.dtype == torch.float16 else None
+        reference_ids = self._forward_collapsed_ids([probe])[0] if probe is not None else None
+        self.model = self.model.to(dtype=self.dtype)
+        self._forward_model = self.model
+        if compile_model:
+            # Dynamic shapes: batches are only padded to their longest clip, so (batch, length) varies per call.
+            self._forward_model = torch.compile(self.model, backend="aot_eager", dynamic=True)
+            self.compiled = True
+        self._warmup()
+        if reference_ids is not None and not np.array_equal(reference_ids, self._forward_collapsed_ids([probe])[0]):
+            sys.stderr.write("warning: fp16 argmax differs from fp32 on the parity probe; consider --dtype fp32\n")
+        self.warmup_ms = (time.time() - t1) * 1000.0
+
+        # Requests are coalesced into padded batches by a single worker thread that owns the model.
+        self._batch_queue: "queue.Queue[tuple[torch.Tensor, threading.Event, dict]]" = queue.Queue()
+        self._batch_thread = threading.Thread(target=self._batch_worker, name="phonemize-batch", daemon=True)
+        self._batch_thread.start()
+
+    def _warmup(self) -> None:
+        # Run one pass on 1s of silence so MPS kernel compilation happens at startup,
+        # not on the first real request.
+        self._forward_collapsed_ids([torch.zeros(16000, dtype=torch.float32)])
+        if self.compiled:
+            # Dynamo specializes the first graph on batch size 1 and on a length range around the first
+            # input; hit both guards now so the fully dynamic graph exists before real traffic arrives.
+            self._forward_collapsed_ids([torch.zeros(16000, dtype=torch.float32)] * 2)
+            self._forward_collapsed_ids([torch.zeros(32000, dtype=torch.float32)])
+        torch.mps.synchronize()
+
+    def _run_model(self, input_values: torch.Tensor, attention_mask: torch.Tensor | None) -> torch.Tensor:
+        if self.compiled:
+            try:
+                return self._forward_model(input_values, attention_mask=attention_mask).logits
+            except torch._dynamo.exc.TorchDynamoException as exc:
+                # TorchRuntimeError is the model itself failing on this input (e.g. too short for the
+                # conv stack), surfaced while tracing; eager would fail the same way.
+                if isinstance(exc, torch._dynamo.exc.TorchRuntimeError):
+                    raise
+                # A (re)compile can fail on any new shape, not just at warmup; drop to eager for good.
+                sys.stderr.write(f"warning: torch.compile failed ({exc}); falling back to eager mode\n")
+                self._forward_model = self.model
+                self.compiled = False
+        return self.model(input_values, attention_mask=attention_mask).logits
+
+    def _prepare_batch(self, audios: list[torch.Tensor]) -> tuple[torch.Tensor, torch.Tensor]:
+        if self.feature_extractor is not None:
+            inputs = self.feature_extractor(
+                [audio.numpy() for audio in audios],
+                sampling_rate=16000,
+                padding=True,
+                return_attention_mask=True,
+                return_tensors="pt",
+            )
+            return inputs.input_values, inputs.attention_mask
+
+        # Mirrors Wav2Vec2FeatureExtractor: zero-mean/unit-variance per utterance, then right-pad.
+        if self.do_normalize:
+            audios = [(audio - audio.mean()) / torch.sqrt(audio.var(unbiased=False) + 1e-7) for audio in audios]
+        longest = max(len(audio) for audio in audios)
+        if len(audios) == 1 and len(audios[0]) == longest:
+            return audios[0].unsqueeze(0), torch.ones((1, longest), dtype=torch.int32)
+
+        values = torch.full((len(audios), longest), self.padding_value, dtype=torch.float32)
+        mask = torch.zeros((len(audios), longest), dtype=torch.int32)
+        for i, audio in enumerate(audios):
+            values[i, : len(audio)] = audio
+            mask[i, : len(audio)] = 1
+        return values, mask
+
+    def _forward_collapsed_ids(self, audios: list[torch.Tensor]) -> list[np.ndarray]:
+        # One padded forward pass; returns per-sample CTC-collapsed ids (blanks and padding frames removed).
+        values, mask = self._prepare_batch(audios)
+        # Async uploads: the forward is queued behind the copies and nothing below blocks the CPU until
+        # the single synchronize before the collapsed ids are read back. `values`/`mask` stay referenced
+        # until then, so the host buffers outlive the copies.
+        input_values = values.to(self.device, dtype=next(self.model.parameters()).dtype, non_blocking=True)
+        # Group-norm checkpoints must not be given a mask; follow the extractor config.
+        attention_mask = mask.to(self.device, non_blocking=True) if self.return_attention_mask else None
+
+        with torch.inference_mode():
+            logits = self._run_model(input_values, attention_mask)
+
+        if logits.device.type != "mps":
+            raise RuntimeError(f"Inference did not run on MPS (got {logits.device}).")
+
+        # CTC collapse on-device so only the (much shorter) collapsed ids cross back to the CPU:
+        # keep the first frame of each run, then drop blanks and frames that only cover padding.
+        pred_ids = torch.argmax(logits, dim=-1)
+        # Tiny temporary host tensor: copy it synchronously, since an async upload could read it after it is freed.
+        frame_counts = self.model._get_feat_extract_output_lengths(mask.sum(-1)).to(self.device)
+        keep = torch.ones_like(pred_ids, dtype=torch.bool)
+        keep[:, 1:] = pred_ids[:, 1:] != pred_ids[:, :-1]
+        keep &= pred_ids != self.blank_id
+        keep &= torch.arange(pred_ids.shape[1], device=self.device)[None, :] < frame_counts[:, None]
+
+        torch.mps.synchronize()
+        collapsed = pred_ids[keep].cpu().numpy()
+        per_sample = keep.sum(dim=-1).cpu().numpy()
+        return np.split(collapsed, np.cumsum(per_sample)[:-1])
+
+    def _batch_worker(self) -> None:
+        timeout_s = max(0.0, self.batch_timeout_ms) / 1000.0
+        while True:
+            batch = [self._batch_queue.get()]
+            deadline = time.time() + timeout_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._batch_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            t0 = time.time()
+            try:
+                batch_ids = self._forward_collapsed_ids([audio for audio, _, _ in batch])
+            except Exception as exc:
+                for _, done, box in batch:
+                    box["error"] = exc
+                    done.set()
+                continue
+
+            infer_ms = (time.time() - t0) * 1000.0
+            for (_, done, box), ids in zip(batch, batch_ids):
+                box["ids"] = ids
+                box["infer_ms"] = infer_ms
+                box["batch_size"] = len(batch)
+                done.set()
+
     def queue_snapshot(self) -> dict:
-        with self._cv:
-            return {"active": self._active, "queued": self._queued}
+        return {"active": self._active, "queued": self._queued}
 
-    def acquire_slot(self) -> bool:
-        deadline = time.time() + max(0.1, self.queue_wait_seconds)
-        with self._cv:
-            if self._active < self.max_inflight:
-                self._active += 1
-                return True
+    async def acquire_slot(self) -> bool:
+        # Runs on the event loop thread only, so the counters need no lock.
+        if not self._slots.locked():
+            await self._slots.acquire()
+            self._active += 1
+            return True
 
-            if self._queued >= self.max_queue:
-                return False
+        if self._queued >= self.max_queue:
+            return False
 
-            self._queued += 1
-            try:
-                while True:
-                    remaining = deadline - time.time()
-                    if remaining <= 0:
-                        return False
-                    self._cv.wait(timeout=remaining)
-                    if self._active < self.max_inflight:
-                        self._active += 1
-                        return True
-            finally:
-                self._queued = max(0, self._queued - 1)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=max(0.1, self.queue_wait_seconds))
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._queued = max(0, self._queued - 1)
+        self._active += 1
+        return True
 
     def release_slot(self) -> None:
-        with self._cv:
-            self._active = max(0, self._active - 1)
-            self._cv.notify()
+        self._active = max(0, self._active - 1)
+        self._slots.release()
+
+    def cache_snapshot(self) -> dict:
+        with self._result_cache_lock:
+            return {
+                "size": len(self._result_cache),
+                "max_size": self.result_cache_size,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+            }
+
+    def _cache_get(self, key: bytes) -> list[str] | None:
+        with self._result_cache_lock:
+            phones = self._result_cache.get(key)
+            if phones is None:
+                self._cache_misses += 1
+                return None
+            self._result_cache.move_to_end(key)
+            self._cache_hits += 1
+            return phones
+
+    def _cache_put(self, key: bytes, phones: list[str]) -> None:
+        if self.result_cache_size <= 0:
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = phones
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
 
     def phonemize_wav_bytes(self, wav_bytes: bytes) -> dict:
+        # Identical uploads (retries, iterating on the same take) skip decode and inference entirely.
+        key = hashlib.blake2b(wav_bytes, digest_size=16).digest()
+        t_hit = time.time()
+        cached = self._cache_get(key)
+        if cached is not None:
+            hit_ms = (time.time() - t_hit) * 1000.0
+            return self._response(list(cached), infer_ms=0.0, total_ms=hit_ms, batch_size=0, cached=True)
+
         audio = read_wav_mono_16k_from_bytes(wav_bytes)
 
         t0 = time.time()
-        inputs = self.feature_extractor(audio, sampling_rate=16000, return_tensors="pt")
-        input_values = inputs.input_values.to(self.device)
+        done = threading.Event()
+        box: dict = {}
+        self._batch_queue.put((audio, done, box))
+        done.wait()
+        if "error" in box:
+            raise box["error"]
 
-        with torch.no_grad():
-            logits = self.model(input_values).logits
-
-        if logits.device.type != "mps":
-            raise RuntimeError(f"Inference did not run on MPS (got {logits.device}).")
-
-        pred_ids = torch.argmax(logits, dim=-1)[0].to("cpu").tolist()
-        blank_id = int(getattr(self.model.config, "pad_token_id", 0))
-        collapsed = ctc_collapse(pred_ids, blank_id)
-
-        phones = []
-        for idx in collapsed:
-            tok = self.id_to_token.get(int(idx))
-            if not tok or tok in self.special_tokens:
-                continue
-            phones.append(tok)
+        ids = box["ids"]
+        phones = self.id_to_token_arr[ids[self.keep_mask[ids]]].tolist()
 
         if not phones:
             raise RuntimeError("Empty phone sequence")
 
-        infer_ms = (time.time() - t0) * 1000.0
+        self._cache_put(key, phones)
+        total_ms = (time.time() - t0) * 1000.0
+        return self._response(list(phones), infer_ms=box["infer_ms"], total_ms=total_ms, batch_size=box["batch_size"], cached=False)
+
+    def _response(self, phones: list[str], infer_ms: float, total_ms: float, batch_size: int, cached: bool) -> dict:
         return {
             "ok": True,
             "phones": phones,
-            "tool": {
-                "name": "wav2vec2",
-                "model": self.model_id,
-                "device": "mps",
-                "torch": torch.__version__,
-                "transformers": __import__("transformers").__version__,
-            },
+            "tool": self._tool_info,
             "timings_ms": {
                 "load_ms": self.load_ms,
                 "infer_ms": infer_ms,
-                "total_ms": infer_ms,
+                "total_ms": total_ms,
             },
+            "batch_size": batch_size,
+            "cached": cached,
         }
 
 
 RUNTIME: Runtime | None = None
 
 
-class Handler(BaseHTTPRequestHandler):
-    server_version = "cb-phonemize/1.0"
-
-    def log_message(self, fmt: str, *args) -> None:
-        # Quiet by default; uncomment for verbose request logs.
-        return
-
-    def _send_json(self, status: int, payload: dict) -> None:
-        body = json.dumps(payload).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
-
-    def do_GET(self) -> None:
-        runtime = RUNTIME
-        if self.path == "/health":
-            if runtime is None:
-                self._send_json(503, {"ok": False, "error": "not_initialized"})
-                return
-            q = runtime.queue_snapshot()
-            self._send_json(
-                200,
-                {
-                    "ok": True,
-                    "model": runtime.model_id,
-                    "device": "mps",
-                    "warm": True,
-                    "active": q["active"],
-                    "queued": q["queued"],
-                    "max_inflight": runtime.max_inflight,
-                    "max_queue": runtime.max_queue,
-                    "forced_align_enabled": runtime.forced_align_enabled,
-                },
-            )
-            return
-        self._send_json(404, {"ok": False, "error": "not_found"})
+def _json(status: int, payload: dict) -> Response:
+    body = orjson.dumps(payload)
+    return Response(body, status_code=status, media_type="application/json; charset=utf-8")
 
-    def do_POST(self) -> None:
-        runtime = RUNTIME
-        if runtime is None:
-            self._send_json(503, {"ok": False, "error": "not_initialized"})
-            return
 
-        if self.path == "/forced-align":
-            if not runtime.forced_align_enabled:
-                self._send_json(404, {"ok": False, "error": "forced_align_disabled"})
-                return
-            self._send_json(501, {"ok": False, "error": "forced_align_not_implemented"})
-            return
+async def health(request: Request) -> Response:
+    runtime = RUNTIME
+    if runtime is None:
+        return _json(503, {"ok": False, "error": "not_initialized"})
+    q = runtime.queue_snapshot()
+    cache = runtime.cache_snapshot()
+    return _json(
+        200,
+        {
+            "ok": True,
+            "model": runtime.model_id,
+            "device": "mps",
+            "dtype": runtime.dtype_name,
+            "warm": True,
+            "warmup_ms": runtime.warmup_ms,
+            "active": q["active"],
+            "queued": q["queued"],
+            "max_inflight": runtime.max_inflight,
+            "max_queue": runtime.max_queue,
+            "max_audio_seconds": runtime.max_audio_seconds,
+            "batch_size": runtime.batch_size,
+            "compiled": runtime.compiled,
+            "result_cache": cache,
+            "forced_align_enabled": runtime.forced_align_enabled,
+        },
+    )
 
-        if self.path != "/phonemize":
-            self._send_json(404, {"ok": False, "error": "not_found"})
-            return
 
-        try:
-            content_length = int(self.headers.get("Content-Length", "0") or "0")
-        except Exception:
-            content_length = 0
-        if content_length <= 0:
-            self._send_json(400, {"ok": False, "error": "empty_body"})
-            return
-        if content_length > runtime.max_payload_bytes:
-            self._send_json(413, {"ok": False, "error": "payload_too_large", "max_payload_bytes": runtime.max_payload_bytes})
-            return
+async def forced_align(request: Request) -> Response:
+    runtime = RUNTIME
+    if runtime is None:
+        return _json(503, {"ok": False, "error": "not_initialized"})
+    if not runtime.forced_align_enabled:
+        return _json(404, {"ok": False, "error": "forced_align_disabled"})
+    return _json(501, {"ok": False, "error": "forced_align_not_implemented"})
 
-        if not runtime.acquire_slot():
-            self._send_json(503, {"ok": False, "error": "queue_full_or_timeout"})
-            return
 
-        try:
-            body = self.rfile.read(content_length)
-            if not body:
-                self._send_json(400, {"ok": False, "error": "empty_body"})
-                return
-            out = runtime.phonemize_wav_bytes(body)
-            self._send_json(200, out)
-        except Exception as exc:
-            self._send_json(400, {"ok": False, "error": str(exc)})
-        finally:
-            runtime.release_slot()
+async def phonemize(request: Request) -> Response:
+    runtime = RUNTIME
+    if runtime is None:
+        return _json(503, {"ok": False, "error": "not_initialized"})
+
+    try:
+        content_length = int(request.headers.get("Content-Length", "0") or "0")
+    except Exception:
+        content_length = 0
+    if content_length <= 0:
+        return _json(400, {"ok": False, "error": "empty_body"})
+    if content_length > runtime.max_payload_bytes:
+        return _json(413, {"ok": False, "error": "payload_too_large", "max_payload_bytes": runtime.max_payload_bytes})
+
+    # Slow uploads are awaited on the event loop and do not hold an inference slot.
+    body = await request.body()
+    if not body:
+        return _json(400, {"ok": False, "error": "empty_body"})
+
+    try:
+        # Bound worst-case model time per request from the header alone, before decoding.
+        audio_seconds = wav_duration_seconds(body)
+    except Exception as exc:
+        return _json(400, {"ok": False, "error": str(exc)})
+    if audio_seconds > runtime.max_audio_seconds:
+        return _json(
+            413,
+            {
+                "ok": False,
+                "error": "audio_too_long",
+                "audio_seconds": audio_seconds,
+                "max_audio_seconds": runtime.max_audio_seconds,
+            },
+        )
+    if audio_seconds < runtime.min_audio_seconds:
+        return _json(
+            400,
+            {
+                "ok": False,
+                "error": "audio_too_short",
+                "audio_seconds": audio_seconds,
+                "min_audio_seconds": runtime.min_audio_seconds,
+            },
+        )
+
+    if not await runtime.acquire_slot():
+        return _json(503, {"ok": False, "error": "queue_full_or_timeout"})
+
+    try:
+        # Decode + the wait on the batch worker block, so keep them off the event loop.
+        out = await run_in_threadpool(runtime.phonemize_wav_bytes, body)
+        return _json(200, out)
+    except Exception as exc:
+        return _json(400, {"ok": False, "error": str(exc)})
+    finally:
+        runtime.release_slot()
+
+
+async def not_found(request: Request, exc: Exception) -> Response:
+    return _json(404, {"ok": False, "error": "not_found"})
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/phonemize", phonemize, methods=["POST"]),
+        Route("/forced-align", forced_align, methods=["POST"]),
+    ],
+    # Unknown paths and wrong methods both answer with the JSON not_found body.
+    exception_handlers={404: not_found, 405: not_found},
+)
 
 
 def main() -> None:
@@ -287,9 +566,20 @@ def main() -> None:
     parser.add_argument("--port", type=int, default=18923)
     parser.add_argument("--model", default=DEFAULT_MODEL)
     parser.add_argument("--max-payload-bytes", type=int, default=8 * 1024 * 1024)
-    parser.add_argument("--max-inflight", type=int, default=1)
+    parser.add_argument("--max-audio-seconds", type=float, default=60.0)
+    parser.add_argument("--max-inflight", type=int, default=8)
     parser.add_argument("--max-queue", type=int, default=8)
     parser.add_argument("--queue-wait-seconds", type=float, default=30.0)
+    parser.add_argument("--batch-size", type=int, default=8, help="Max requests coalesced into one forward pass")
+    parser.add_argument("--batch-timeout-ms", type=float, default=10.0, help="How long to wait to fill a batch")
+    parser.add_argument("--result-cache-size", type=int, default=256, help="Cached results by WAV hash (0 disables)")
+    parser.add_argument(
+        "--compile",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Experimental: capture the forward graph with torch.compile (falls back to eager if capture fails)",
+    )
+    parser.add_argument("--dtype", choices=["fp32", "fp16"], default="fp16", help="Model weight precision on MPS")
     args = parser.parse_args()
 
     forced_align_enabled = os.environ.get("CIRCUIT_BREAKER_FORCED_ALIGN", "") == "1"
@@ -298,18 +588,31 @@ def main() -> None:
     RUNTIME = Runtime(
         model_id=args.model,
         max_payload_bytes=max(1024, int(args.max_payload_bytes)),
+        max_audio_seconds=max(1.0, float(args.max_audio_seconds)),
         max_inflight=max(1, int(args.max_inflight)),
         max_queue=max(0, int(args.max_queue)),
         queue_wait_seconds=max(0.5, float(args.queue_wait_seconds)),
         forced_align_enabled=forced_align_enabled,
+        dtype=args.dtype,
+        batch_size=max(1, int(args.batch_size)),
+        batch_timeout_ms=max(0.0, float(args.batch_timeout_ms)),
+        result_cache_size=max(0, int(args.result_cache_size)),
+        compile_model=bool(args.compile),
     )
 
-    server = ThreadingHTTPServer((args.host, int(args.port)), Handler)
     sys.stderr.write(
         f"phonemize_server listening on http://{args.host}:{args.port} "
-        f"model={args.model} max_inflight={RUNTIME.max_inflight} max_queue={RUNTIME.max_queue}\\n"
+        f"model={args.model} max_inflight={RUNTIME.max_inflight} max_queue={RUNTIME.max_queue} dtype={RUNTIME.dtype_name}\\n"
+    )
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=int(args.port),
+        log_level="warning",
+        access_log=False,
+        server_header=False,
+        headers=[("server", "cb-phonemize/1.0")],
     )
-    server.serve_forever()
 
 
 if __name__ == "__main__":